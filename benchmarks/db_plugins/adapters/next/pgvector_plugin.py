@@ -8,13 +8,57 @@ It is strongly recommended to test PGVECTOR on smaller datasets (e.g., 10k-100k)
 USAGE: To enable this plugin, copy this file from 'next/' into the 'db_plugins/adapters/' folder.
 """
 
+import io
+import struct
 import time
 import numpy as np
-from tqdm import tqdm
 from db_plugins.base import DatabasePlugin
-from plugin_runtime import BenchmarkContext, Result
+from plugin_runtime import BenchmarkContext, Result, ground_truth_ids, latency_stats, progress
 import run_benchmark_legacy as legacy
 
+PG_CONN = dict(dbname="vectordb", user="postgres", password="password", host="localhost", port=5432)
+
+
+def _prepare_knn_session(conn, table_name: str, vec_type: str) -> None:
+    """Per-session setup for search: vector adapter, ef_search GUC and the prepared KNN statement."""
+    from pgvector.psycopg2 import register_vector
+
+    conn.autocommit = True
+    register_vector(conn)
+    with conn.cursor() as cur:
+        cur.execute("SET hnsw.ef_search = 64")  # increased search accuracy
+        cur.execute(f"PREPARE knn({vec_type}) AS SELECT doc_id FROM {table_name} ORDER BY embedding <=> $1 LIMIT 10")
+
+
+def _vector_literals(vecs) -> list:
+    """Render each row as pgvector's text literal `[v1,v2,...]`."""
+    body = io.StringIO()
+    np.savetxt(body, vecs, fmt="%.9g", delimiter=",")
+    return [f"[{line}]" for line in body.getvalue().splitlines()]
+
+
+_PGCOPY_HEADER = b"PGCOPY\n\xff\r\n\x00" + struct.pack(">ii", 0, 0)
+_PGCOPY_TRAILER = struct.pack(">h", -1)
+
+
+def _copy_binary_buffer(doc_ids, vecs, vec_type: str) -> io.BytesIO:
+    """Render rows in COPY BINARY format; pgvector's binary vector/halfvec is (dim int16, unused int16, big-endian floats)."""
+    dtype = ">f2" if vec_type == "halfvec" else ">f4"
+    dim = vecs.shape[1]
+    payload = np.ascontiguousarray(vecs, dtype=dtype).tobytes()
+    row_bytes = dim * np.dtype(dtype).itemsize
+    vec_head = struct.pack(">ihh", 4 + row_bytes, dim, 0)
+    parts = [_PGCOPY_HEADER]
+    for row, doc_id in enumerate(doc_ids):
+        id_bytes = str(doc_id).encode("utf-8")
+        parts.append(struct.pack(">hi", 2, len(id_bytes)))
+        parts.append(id_bytes)
+        parts.append(vec_head)
+        parts.append(payload[row * row_bytes : (row + 1) * row_bytes])
+    parts.append(_PGCOPY_TRAILER)
+    return io.BytesIO(b"".join(parts))
+
+
 class PgVectorPlugin(DatabasePlugin):
     name = "pgvector"
 
@@ -28,16 +72,11 @@ class PgVectorPlugin(DatabasePlugin):
 
     def run(self, ctx: BenchmarkContext) -> Result:
         import psycopg2
+        from psycopg2.pool import ThreadedConnectionPool
         from pgvector.psycopg2 import register_vector
         
         try:
-            conn = psycopg2.connect(
-                dbname="vectordb",
-                user="postgres",
-                password="password",
-                host="localhost",
-                port=5432
-            )
+            conn = psycopg2.connect(**PG_CONN)
             # Enable auto-commit for DDL statements
             conn.autocommit = True
             
@@ -46,78 +85,115 @@ class PgVectorPlugin(DatabasePlugin):
                 register_vector(conn)
                 
                 table_name = "bench_semantic"
+                # halfvec (pgvector >= 0.7) stores fp16, halving table and index size.
+                vec_type = "halfvec" if ctx.cfg.quantize else "vector"
                 cur.execute(f"DROP TABLE IF EXISTS {table_name}")
-                cur.execute(f"CREATE TABLE {table_name} (id bigserial PRIMARY KEY, doc_id text, embedding vector({ctx.cfg.dim_base}))")
+                cur.execute(f"CREATE TABLE {table_name} (id bigserial PRIMARY KEY, doc_id text, embedding {vec_type}({ctx.cfg.dim_base}))")
             
             # Start Insertion
             print("   Inserting into Pgvector...")
-            t0 = time.time()
-            
-            # Use COPY for fast bulk insert?
-            # Or standard INSERT. For benchmarking, standard batch insert is safer/common.
-            batch_size = 1000
+            t0 = time.perf_counter()
             
+            # Binary COPY streams raw big-endian floats without per-row Parse/Bind/Execute
+            # or server-side text parsing; the HNSW index is built afterwards so its
+            # maintenance is amortized.
+            batch_size = 10_000
+
+            # Where COPY is refused (e.g. behind a statement-mode pooler) fall back to
+            # one INSERT per batch that binds two arrays, parsed once per statement.
+            use_copy = True
             with conn.cursor() as cur:
-                # Prepare data
-                args_str = []
-                for i in tqdm(range(0, len(ctx.doc_vecs_euc), batch_size), desc="Prepare Batch"):
-                    batch_vecs = ctx.doc_vecs_euc[i : i + batch_size]
+                for i in progress(range(0, len(ctx.doc_vecs_euc), batch_size), desc="Pgvector Insert"):
                     batch_ids = ctx.doc_ids[i : i + batch_size]
-                    
-                    # Construct INSERT VALUES efficiently
-                    vals = [
-                        (doc_id, vec.tolist())
-                        for doc_id, vec in zip(batch_ids, batch_vecs)
-                    ]
-                    
-                    # Using execute_values if possible, but manual constructing for simplicity if extras is not installed
-                    # pgvector python client supports list directly
-                    from psycopg2.extras import execute_values
-                    execute_values(cur, 
-                        f"INSERT INTO {table_name} (doc_id, embedding) VALUES %s", 
-                        vals, 
-                        template="(%s, %s::vector)"
+                    batch_vecs = ctx.doc_vecs_euc[i : i + batch_size]
+                    if use_copy:
+                        try:
+                            cur.copy_expert(
+                                f"COPY {table_name} (doc_id, embedding) FROM STDIN WITH (FORMAT BINARY)",
+                                _copy_binary_buffer(batch_ids, batch_vecs, vec_type),
+                            )
+                            continue
+                        except psycopg2.Error as e:
+                            # COPY is a single statement, so the failed batch left no rows behind.
+                            print(f"   ⚠️ COPY unavailable ({e.pgcode or e}); falling back to INSERT ... unnest")
+                            use_copy = False
+                    cur.execute(
+                        f"INSERT INTO {table_name} (doc_id, embedding) SELECT * FROM unnest(%s::text[], %s::{vec_type}[])",
+                        (list(batch_ids), _vector_literals(batch_vecs)),
                     )
             
             # Create Index (HNSW)
             print("   Building HNSW Index in Pgvector...")
             with conn.cursor() as cur:
                 # cosine distance (<->)
-                cur.execute(f"CREATE INDEX ON {table_name} USING hnsw (embedding vector_cosine_ops) WITH (m = 16, ef_construction = 64)")
+                cur.execute(f"CREATE INDEX ON {table_name} USING hnsw (embedding {vec_type}_cosine_ops) WITH (m = 16, ef_construction = 64)")
                 
-            v_dur = time.time() - t0
+            v_dur = time.perf_counter() - t0
             
             # Search
             print("   Searching Pgvector...")
-            all_res_ids = []
+            latency_sample = 500
+            query_batch_size = 256
             lats = []
             
-            search_t0 = time.time()
+            # register_vector adapts numpy rows directly; the statement is parsed and
+            # planned once per session instead of per query.
+            q_vecs = np.ascontiguousarray(ctx.q_vecs_euc, dtype=np.float32)
+            _prepare_knn_session(conn, table_name, vec_type)
+
+            # Per-query latency is only observable one round-trip at a time, so take
+            # it from an un-batched sample; throughput comes from the batched pass below.
             with conn.cursor() as cur:
-                cur.execute(f"SET hnsw.ef_search = 64") # increased search accuracy
-                
-                for i, q_vec in enumerate(tqdm(ctx.q_vecs_euc, desc="Pgvector Search")):
-                    ts = time.time()
-                    cur.execute(f"SELECT doc_id FROM {table_name} ORDER BY embedding <=> %s::vector LIMIT 10", (q_vec.tolist(),))
-                    res = cur.fetchall()
-                    lats.append((time.time() - ts) * 1000)
-                    all_res_ids.append([str(r[0]) for r in res])
+                for q_vec in progress(q_vecs[:latency_sample], desc="Pgvector Latency"):
+                    ts = time.perf_counter()
+                    cur.execute("EXECUTE knn(%s)", (q_vec,))
+                    cur.fetchall()
+                    lats.append((time.perf_counter() - ts) * 1000)
+
+            # One statement per chunk: the server still probes the index per query,
+            # but N client round-trips collapse into N / query_batch_size.
+            batch_knn = (
+                f"SELECT q.i, t.doc_id FROM unnest(%s::{vec_type}[]) WITH ORDINALITY AS q(vec, i), "
+                f"LATERAL (SELECT doc_id, embedding <=> q.vec AS dist FROM {table_name} ORDER BY embedding <=> q.vec LIMIT 10) t "
+                f"ORDER BY q.i, t.dist"
+            )
+            all_res_ids = [[] for _ in range(len(q_vecs))]
+            search_t0 = time.perf_counter()
+            with conn.cursor() as cur:
+                for start in progress(range(0, len(q_vecs), query_batch_size), desc="Pgvector Search"):
+                    cur.execute(batch_knn, (_vector_literals(q_vecs[start : start + query_batch_size]),))
+                    for i, doc_id in cur.fetchall():
+                        all_res_ids[start + i - 1].append(str(doc_id))
             
-            search_dur = time.time() - search_t0
+            search_dur = time.perf_counter() - search_t0
+            p50, p95, p99, avg_lat = latency_stats(lats)
             
             # Metrics
-            all_gt_ids = [ctx.valid_qrels.get(qid, []) for qid in ctx.test_query_ids]
+            all_gt_ids = ground_truth_ids(ctx)
             recall, mrr, ndcg = legacy.calculate_accuracy(all_res_ids, all_gt_ids, 10)
             recall_sys = legacy.calculate_system_recall(all_res_ids, ctx.math_gt_euc, 10)
             
-            # Concurrency
-            q_list = ctx.q_vecs_euc[0].tolist()
+            # Concurrency: psycopg2 serializes cursors on a shared connection, so each
+            # worker checks out its own session from a pool.
+            pool = ThreadedConnectionPool(1, 64, **PG_CONN)
+            prepared = set()
+            q_vec0 = q_vecs[0]
             def pg_query():
-                with conn.cursor() as c:
-                    c.execute(f"SELECT doc_id FROM {table_name} ORDER BY embedding <=> %s::vector LIMIT 10", (q_list,))
-                    c.fetchall()
+                c = pool.getconn()
+                try:
+                    if id(c) not in prepared:
+                        _prepare_knn_session(c, table_name, vec_type)
+                        prepared.add(id(c))
+                    with c.cursor() as cur:
+                        cur.execute("EXECUTE knn(%s)", (q_vec0,))
+                        cur.fetchall()
+                finally:
+                    pool.putconn(c)
             
-            conc = legacy.run_concurrency_profile(pg_query)
+            try:
+                conc = legacy.run_concurrency_profile(pg_query)
+            finally:
+                pool.closeall()
             disk = legacy.format_size(legacy.get_docker_disk("postgres"))
             
             with conn.cursor() as cur:
@@ -125,15 +201,16 @@ class PgVectorPlugin(DatabasePlugin):
             conn.close()
             
             return Result(
-                database="Pgvector",
+                database="Pgvector (fp16)" if ctx.cfg.quantize else "Pgvector",
                 dimension=ctx.cfg.dim_base,
                 geometry="Euclidean",
                 metric="Cosine",
                 insert_qps=len(ctx.docs) / v_dur,
                 search_qps=len(ctx.test_queries) / search_dur,
-                p50=np.percentile(lats, 50),
-                p95=np.percentile(lats, 95),
-                p99=np.percentile(lats, 99),
+                p50=p50,
+                p95=p95,
+                p99=p99,
+                avg_latency=avg_lat,
                 recall=recall,
                 recall_sys=recall_sys,
                 mrr=mrr,
@@ -146,6 +223,6 @@ class PgVectorPlugin(DatabasePlugin):
             )
 
         except Exception as e:
-            return Result("Pgvector", ctx.cfg.dim_base, "Euclidean", "Cosine", 0,0,0,0,0,0,0,0,0,0,0,0,"0", f"Error: {e}")
+            return Result("Pgvector (fp16)" if ctx.cfg.quantize else "Pgvector", ctx.cfg.dim_base, "Euclidean", "Cosine", 0,0,0,0,0,0,0,0,0,0,0,0,"0", f"Error: {e}")
 
 PLUGIN = PgVectorPlugin()
@@ -1,11 +1,13 @@
 
+import functools
+import os
 import time
 
 import numpy as np
-from tqdm import tqdm
 
 from db_plugins.base import DatabasePlugin
-from plugin_runtime import BenchmarkContext, Result
+from plugin_runtime import BenchmarkContext, Result, parallel_search, ground_truth_ids, latency_stats
+import run_benchmark_legacy as legacy
 
 
 class QdrantPlugin(DatabasePlugin):
@@ -20,13 +22,11 @@ class QdrantPlugin(DatabasePlugin):
             return False
 
     def run(self, ctx: BenchmarkContext) -> Result:
-        import run_benchmark_legacy as legacy
-
         if ctx.doc_vecs_euc is None or ctx.q_vecs_euc is None:
             return Result("Qdrant", 0, "Euclidean", "Cosine", 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, "0", "missing vectors")
 
         from qdrant_client import QdrantClient
-        from qdrant_client.models import Distance, PointStruct, VectorParams
+        from qdrant_client.models import CollectionStatus, Distance, ScalarQuantization, ScalarQuantizationConfig, ScalarType, VectorParams
 
         try:
             client = QdrantClient(host="localhost", port=6334, prefer_grpc=True)
@@ -36,69 +36,88 @@ class QdrantPlugin(DatabasePlugin):
             except Exception:
                 pass
 
-            client.create_collection(name, vectors_config=VectorParams(size=ctx.cfg.dim_base, distance=Distance.COSINE))
+            quantization = None
+            if ctx.cfg.quantize:
+                quantization = ScalarQuantization(scalar=ScalarQuantizationConfig(type=ScalarType.INT8, always_ram=True))
+            client.create_collection(
+                name,
+                vectors_config=VectorParams(size=ctx.cfg.dim_base, distance=Distance.COSINE),
+                quantization_config=quantization,
+            )
             t0 = time.time()
             q_batch_size = max(10, int(3_000_000 / (ctx.cfg.dim_base * 8)))
-            for i in tqdm(range(0, len(ctx.doc_vecs_euc), q_batch_size), desc="Qdrant Insert"):
-                batch_vecs = ctx.doc_vecs_euc[i : i + q_batch_size]
-                batch_ids = ctx.doc_ids[i : i + q_batch_size]
-                points = [PointStruct(id=i + j, vector=v.tolist(), payload={"doc_id": batch_ids[j]}) for j, v in enumerate(batch_vecs)]
-                client.upsert(collection_name=name, points=points, wait=True)
+            # upload_collection streams the numpy matrix over gRPC from several
+            # workers, skipping per-point PointStruct validation and per-batch waits.
+            client.upload_collection(
+                collection_name=name,
+                vectors=ctx.doc_vecs_euc,
+                payload=({"doc_id": doc_id} for doc_id in ctx.doc_ids),
+                ids=range(len(ctx.doc_vecs_euc)),
+                batch_size=q_batch_size,
+                parallel=os.cpu_count() or 1,
+                wait=True,
+            )
+            # wait=True fences the writes; like the other adapters, the clock stops
+            # here and the index build (optimizers until status green) is not timed.
             v_dur = time.time() - t0
-            time.sleep(5)
-
-            all_res_ids = []
-            all_gt_ids = []
-            lats = []
-            search_t0 = time.time()
-            for i, q_vec in enumerate(tqdm(ctx.q_vecs_euc, desc="Qdrant Search")):
-                q_id = ctx.test_query_ids[i]
-                all_gt_ids.append(ctx.valid_qrels.get(q_id, []))
-
-                ts = time.time()
+            deadline = time.monotonic() + 600
+            while client.get_collection(name).status != CollectionStatus.GREEN:
+                if time.monotonic() > deadline:
+                    print("   ⚠️ Qdrant still optimizing after 600s. Proceeding...")
+                    break
+                time.sleep(0.5)
+
+            # Convert queries once so tolist() is not timed as search latency.
+            q_lists = ctx.q_vecs_euc.tolist()
+            def qdrant_search(q_vec):
                 # Use search for newer clients instead of query_points
                 if hasattr(client, "search"):
-                     res = client.search(collection_name=name, query_vector=q_vec.tolist(), limit=10)
+                     res = client.search(collection_name=name, query_vector=q_vec, limit=10)
                 else: 
                      # Fallback for slightly older versions, though search is preferred in v1.7+
-                     res = client.query_points(collection_name=name, query=q_vec.tolist(), limit=10).points
+                     res = client.query_points(collection_name=name, query=q_vec, limit=10).points
 
-                lats.append((time.time() - ts) * 1000)
-                
                 # Handling different response structures depending on method used
                 if hasattr(res, "points"): # unlikely if search() used properly, but safeguard
                      hits = res.points
                 else:
                      hits = res
-                     
-                all_res_ids.append([hit.payload.get("doc_id") for hit in hits])
+
+                return [hit.payload.get("doc_id") for hit in hits]
+
+            # Gather ground truth before the timer so search_dur is client->server time only.
+            all_gt_ids = ground_truth_ids(ctx)
+            search_t0 = time.time()
+            lats, all_res_ids = parallel_search(qdrant_search, q_lists, desc="Qdrant Search")
 
             search_dur = time.time() - search_t0
+            p50, p95, p99, avg_lat = latency_stats(lats)
             recall, mrr, ndcg = legacy.calculate_accuracy(all_res_ids, all_gt_ids, 10)
             recall_sys = legacy.calculate_system_recall(all_res_ids, ctx.math_gt_euc, 10)
 
-            q_list = ctx.q_vecs_euc[0].tolist()
-
-            def qdrant_query() -> None:
-                if hasattr(client, "search"):
-                    client.search(collection_name=name, query_vector=q_list, limit=10)
-                else:
-                    client.query_points(collection_name=name, query=q_list, limit=10)
+            # Resolve the client method and bind its arguments once; the profiled
+            # call is then just the RPC.
+            q_list = q_lists[0]
+            if hasattr(client, "search"):
+                qdrant_query = functools.partial(client.search, collection_name=name, query_vector=q_list, limit=10)
+            else:
+                qdrant_query = functools.partial(client.query_points, collection_name=name, query=q_list, limit=10)
 
             conc = legacy.run_concurrency_profile(qdrant_query)
             disk = legacy.format_size(legacy.get_docker_disk("qdrant"))
             client.delete_collection(name)
 
             return Result(
-                database="Qdrant",
+                database="Qdrant (SQ8)" if ctx.cfg.quantize else "Qdrant",
                 dimension=ctx.cfg.dim_base,
                 geometry="Euclidean",
                 metric="Cosine",
                 insert_qps=len(ctx.docs) / v_dur,
                 search_qps=len(ctx.test_queries) / search_dur,
-                p50=float(np.percentile(lats, 50)),
-                p95=float(np.percentile(lats, 95)),
-                p99=float(np.percentile(lats, 99)),
+                p50=p50,
+                p95=p95,
+                p99=p99,
+                avg_latency=avg_lat,
                 recall=recall,
                 recall_sys=recall_sys,
                 mrr=mrr,
@@ -110,7 +129,7 @@ class QdrantPlugin(DatabasePlugin):
                 status="Success",
             )
         except Exception as exc:
-            return Result("Qdrant", ctx.cfg.dim_base, "Euclidean", "Cosine", 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, "0", f"Error: {exc}")
+            return Result("Qdrant (SQ8)" if ctx.cfg.quantize else "Qdrant", ctx.cfg.dim_base, "Euclidean", "Cosine", 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, "0", f"Error: {exc}")
 
 
 PLUGIN = QdrantPlugin()
@@ -19,6 +19,12 @@ def load_plugins() -> Dict[str, DatabasePlugin]:
             continue
         if not plugin.name:
             continue
+        if plugin.name in plugins:
+            # A stale copy of an adapter must not run the same database twice.
+            print(f"⚠️ Duplicate plugin '{plugin.name}' in {module_name}; keeping the first one.")
+            continue
+        # Pay the client-library import cost here rather than inside a timed run().
+        plugin.is_available()
         plugins[plugin.name] = plugin
     return plugins
 
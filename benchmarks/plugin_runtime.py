@@ -1,10 +1,14 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
 
 import numpy as np
+from tqdm import tqdm
 
 
-@dataclass
+@dataclass(slots=True)
 class Result:
     database: str
     dimension: int
@@ -24,9 +28,10 @@ class Result:
     c30_qps: float
     disk_usage: str
     status: str
+    avg_latency: float = 0.0
 
 
-@dataclass
+@dataclass(slots=True)
 class BenchmarkContext:
     cfg: Any
     docs: List[str]
@@ -40,3 +45,66 @@ class BenchmarkContext:
     q_vecs_hyp: Optional[np.ndarray]
     math_gt_euc: List[List[str]]
     math_gt_hyp: List[List[str]]
+    # valid_qrels per test query, precomputed once by the caller before fan-out.
+    all_gt_ids: Optional[List[List[str]]] = None
+
+    def __post_init__(self) -> None:
+        # Every client ships float32 (or converts to it), so normalise once here
+        # rather than letting each plugin walk a float64 or strided buffer.
+        for field in ("doc_vecs_euc", "q_vecs_euc", "doc_vecs_hyp", "q_vecs_hyp"):
+            vecs = getattr(self, field)
+            if vecs is not None:
+                setattr(self, field, np.ascontiguousarray(vecs, dtype=np.float32))
+
+
+def ground_truth_ids(ctx: BenchmarkContext, n: Optional[int] = None) -> List[List[str]]:
+    """ctx.all_gt_ids when the caller precomputed it, otherwise rebuilt from valid_qrels."""
+    if ctx.all_gt_ids is not None:
+        gt = ctx.all_gt_ids
+    else:
+        gt = [ctx.valid_qrels.get(q_id, []) for q_id in ctx.test_query_ids]
+    return gt if n is None else gt[:n]
+
+
+def latency_stats(lats: Sequence[float]) -> Tuple[float, float, float, float]:
+    """(p50, p95, p99, mean) of per-query latencies; np.quantile partitions, no full sort."""
+    a = np.asarray(lats, dtype=np.float64)
+    if not len(a):
+        return 0.0, 0.0, 0.0, 0.0
+    p50, p95, p99 = np.quantile(a, [0.5, 0.95, 0.99])
+    return float(p50), float(p95), float(p99), float(a.mean())
+
+
+def progress(iterable: Iterable, desc: str, total: Optional[int] = None) -> tqdm:
+    """tqdm throttled for timed loops; set BENCH_NO_TQDM=1 to disable it entirely."""
+    if total is None and hasattr(iterable, "__len__"):
+        total = len(iterable)
+    return tqdm(
+        iterable,
+        desc=desc,
+        total=total,
+        mininterval=1.0,
+        miniters=max(1, (total or 0) // 100),
+        disable=bool(os.environ.get("BENCH_NO_TQDM")),
+    )
+
+
+def parallel_search(
+    query_fn: Callable[[Any], List[str]],
+    queries: Sequence[Any],
+    desc: str,
+    workers: int = 16,
+) -> Tuple[List[float], List[List[str]]]:
+    """Run query_fn over queries on a thread pool so the server, not RTT, bounds QPS.
+
+    Each call is timed individually inside its worker; latencies (ms) and result
+    ids are returned in query order.
+    """
+    def timed(query):
+        ts = time.perf_counter()
+        ids = query_fn(query)
+        return (time.perf_counter() - ts) * 1000, ids
+
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        out = list(progress(ex.map(timed, queries), desc=desc, total=len(queries)))
+    return [lat for lat, _ in out], [ids for _, ids in out]
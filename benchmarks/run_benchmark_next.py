@@ -158,18 +158,19 @@ def prepare_context(cfg: legacy.Config, target_db: str | None = None) -> Benchma
     if doc_vecs_hyp is not None and q_vecs_hyp is not None:
         math_gt_hyp = legacy.calculate_brute_force_gt(q_vecs_hyp, doc_vecs_hyp, doc_ids, k=10, metric="poincare")
 
-    return BenchmarkContext(cfg, docs, doc_ids, test_queries, test_query_ids, valid_qrels, doc_vecs_euc, q_vecs_euc, doc_vecs_hyp, q_vecs_hyp, math_gt_euc, math_gt_hyp)
+    all_gt_ids = [valid_qrels.get(q_id, []) for q_id in test_query_ids]
+    return BenchmarkContext(cfg, docs, doc_ids, test_queries, test_query_ids, valid_qrels, doc_vecs_euc, q_vecs_euc, doc_vecs_hyp, q_vecs_hyp, math_gt_euc, math_gt_hyp, all_gt_ids)
 
 
 def write_story(cfg: legacy.Config, docs: List[str], queries: List[str], final_results: List[Result]) -> None:
     with open("BENCHMARK_STORY_MODULAR.md", "w") as f:
         f.write("# Modular Benchmark Report\n\n")
         f.write(f"Testing on **{cfg.dataset_name}** with **{len(docs):,}** docs and **{len(queries):,}** queries.\n\n")
-        f.write("| Database | Dim | Geometry | Metric | Ins QPS | Srch QPS | P99 Lat | Recall(Sem)@10 | Recall(Sys)@10 | MRR | NDCG@10 | C1 | C10 | C30 | Disk |\n")
-        f.write("| :--- | :--- | :--- | :--- | :--- | :--- | :--- | :--- | :--- | :--- | :--- | :--- | :--- | :--- | :--- |\n")
+        f.write("| Database | Dim | Geometry | Metric | Ins QPS | Srch QPS | Avg Lat | P99 Lat | Recall(Sem)@10 | Recall(Sys)@10 | MRR | NDCG@10 | C1 | C10 | C30 | Disk |\n")
+        f.write("| :--- | :--- | :--- | :--- | :--- | :--- | :--- | :--- | :--- | :--- | :--- | :--- | :--- | :--- | :--- | :--- |\n")
         for r in final_results:
             if r.status == "Success":
-                f.write(f"| **{r.database}** | {r.dimension:,} | {r.geometry} | {r.metric} | {r.insert_qps:,.0f} | {r.search_qps:,.0f} | {r.p99:.2f}ms | {r.recall:.1%} | {r.recall_sys:.1%} | {r.mrr:.2f} | {r.ndcg:.2f} | {r.c1_qps:,.0f} | {r.c10_qps:,.0f} | {r.c30_qps:,.0f} | {r.disk_usage} |\n")
+                f.write(f"| **{r.database}** | {r.dimension:,} | {r.geometry} | {r.metric} | {r.insert_qps:,.0f} | {r.search_qps:,.0f} | {r.avg_latency:.2f}ms | {r.p99:.2f}ms | {r.recall:.1%} | {r.recall_sys:.1%} | {r.mrr:.2f} | {r.ndcg:.2f} | {r.c1_qps:,.0f} | {r.c10_qps:,.0f} | {r.c30_qps:,.0f} | {r.disk_usage} |\n")
 
 
 def main() -> None:
@@ -262,8 +262,12 @@ class HyperspaceClient:
         # Fast path: already Python list (protobuf will consume directly).
         if isinstance(vector, list):
             return vector
-        # Common path for tuples/numpy arrays/iterables.
-        # Keep explicit list conversion once per request.
+        # numpy arrays: one C-level tolist() yields Python floats, instead of
+        # list() boxing a numpy scalar per element for protobuf to re-check.
+        tolist = getattr(vector, "tolist", None)
+        if tolist is not None:
+            return tolist()
+        # Tuples/iterables.
         return list(vector)
 
     @staticmethod
@@ -612,6 +616,10 @@ class HyperspaceClient:
     def batch_insert(self, vectors: List[List[float]], ids: List[int], metadatas: List[Dict[str, str]] = None, typed_metadatas: List[Dict[str, object]] = None, collection: str = "", durability: int = Durability.DEFAULT) -> bool:
         if len(vectors) != len(ids):
              raise ValueError("Vectors and IDs length mismatch")
+        # 2-D numpy batch: one C-level tolist() for the whole matrix, so every row
+        # below takes the list fast path instead of converting row by row.
+        if getattr(vectors, "ndim", 1) == 2:
+            vectors = vectors.tolist()
         
         proto_vectors = []
         if metadatas is None and typed_metadatas is None: